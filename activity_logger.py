@@ -1,123 +1,514 @@
 """
 activity_logger.py - Records all user activities with timestamps
+
+Entries are stored one JSON object per line; the boxed, human-readable
+layout is rendered only when logs are read back.
 """
+import atexit
+import json
+import logging
 import os
-from datetime import datetime
+import queue
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from json.encoder import encode_basestring as _json_str
+from logging.handlers import BufferingHandler, QueueHandler, QueueListener
 from pathlib import Path
-import pytz
+from typing import Dict, Final, List, Tuple
+
+# Log file path (JSON lines)
+LOG_FILE = Path(__file__).parent / "data" / "activity_log.jsonl"
+
+# Boxed text log written by earlier versions; converted into LOG_FILE on import
+_LEGACY_LOG = LOG_FILE.with_name("activity_log.txt")
+_LEGACY_FIELDS = (
+    ("ACTIVITY LOG - ", "date"),
+    ("Time:", "time"),
+    ("Action:", "action"),
+    ("Details:", "details"),
+    ("Category:", "category"),
+)
+
+# India Standard Time: a fixed UTC+05:30 offset with no DST
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+# Raw O_APPEND descriptor, written only from the QueueListener thread.
+# log_activity emits through a QueueHandler; the listener feeds records to
+# _ActivityFileHandler, which appends up to _BATCH_MAX entries per os.write.
+_BATCH_MAX = 32
+_OPEN_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+_log_fd = None
+_log_dir_ready = None  # directory already known to exist
 
-# Log file path
-LOG_FILE = Path(__file__).parent / "data" / "activity_log.txt"
+# Size-capped segments: the active log rolls over to activity_log.1.jsonl once
+# it reaches _ROTATE_BYTES, and at most _ROTATE_KEEP rolled segments are kept.
+_ROTATE_BYTES = 10_000_000
+_ROTATE_KEEP = 3
+
+# Parsed sidecar indexes per index path: (inode, bytes parsed, date -> byte ranges)
+_index_cache: Dict[Path, Tuple[int, int, Dict[str, List[Tuple[int, int]]]]] = {}
+_index_lock = threading.Lock()
 
 def _ensure_log_dir():
-    """Create log directory if it doesn't exist."""
-    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+    """Create log directory if it doesn't exist (checked once per directory)."""
+    global _log_dir_ready
+    if _log_dir_ready != LOG_FILE.parent:
+        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _log_dir_ready = LOG_FILE.parent
+
+def _get_log_fd():
+    """Open the shared append descriptor on first use."""
+    global _log_fd
+    if _log_fd is None:
+        _ensure_log_dir()
+        _log_fd = os.open(LOG_FILE, _OPEN_FLAGS, 0o644)
+    return _log_fd
+
+def _segment(n: int) -> Path:
+    """Log segment n: 0 is the active file, higher numbers are older."""
+    if n == 0:
+        return LOG_FILE
+    return LOG_FILE.with_name(f"{LOG_FILE.stem}.{n}{LOG_FILE.suffix}")
+
+def _segments() -> List[Path]:
+    """Existing log segments, newest first."""
+    return [path for path in map(_segment, range(_ROTATE_KEEP + 1)) if path.exists()]
+
+def _index_file(log_path: Path) -> Path:
+    """Sidecar index mapping each date to its byte ranges in log_path."""
+    return log_path.with_suffix(".idx")
+
+def _rotate() -> None:
+    """Close the active log and shift every segment and its index one step older.
+
+    Callers hold _index_lock.
+    """
+    global _log_fd
+    if _log_fd is not None:
+        os.close(_log_fd)
+        _log_fd = None
+    for n in range(_ROTATE_KEEP, 0, -1):
+        src, dst = _segment(n - 1), _segment(n)
+        for a, b in ((src, dst), (_index_file(src), _index_file(dst))):
+            if a.exists():
+                os.replace(a, b)
+    # Every index path now names a different file
+    _index_cache.clear()
+
+def _add_range(ranges: List[Tuple[str, int, int]], date: str, start: int, end: int) -> None:
+    """Record a byte range, extending the previous one when it continues the same date."""
+    if ranges and ranges[-1][0] == date and ranges[-1][2] == start:
+        ranges[-1] = (date, ranges[-1][1], end)
+    else:
+        ranges.append((date, start, end))
+
+def _write_index(log_path: Path, ranges: List[Tuple[str, int, int]]) -> None:
+    """Append (date, start, end) ranges to log_path's sidecar index."""
+    with open(_index_file(log_path), "a", encoding="utf-8") as f:
+        f.writelines(f"{date} {start} {end}\n" for date, start, end in ranges)
+
+def _rebuild_index(log_path: Path) -> None:
+    """Index an existing log segment that has no sidecar index yet.
+
+    Callers hold _index_lock.
+    """
+    _index_cache.pop(_index_file(log_path), None)
+    ranges: List[Tuple[str, int, int]] = []
+    offset = 0
+    with open(log_path, "rb") as f:
+        for line in f:
+            end = offset + len(line)
+            try:
+                _add_range(ranges, json.loads(line)["ts"][:10], offset, end)
+            except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                pass
+            offset = end
+    _write_index(log_path, ranges)
+
+def _write_batch(batch: List[Tuple[str, bytes]]) -> None:
+    """Append a batch of entries in a single write and index their byte ranges."""
+    payload = memoryview(b"".join(data for _, data in batch))
+    # (date, start, end) of each entry within payload
+    spans: List[Tuple[str, int, int]] = []
+    pos = 0
+    for date, data in batch:
+        spans.append((date, pos, pos + len(data)))
+        pos += len(data)
+
+    # Rotation, the append and its index entries happen under _index_lock, so
+    # a reader rebuilding a missing index never sees bytes the writer is about
+    # to index, including the first ones of a freshly rotated segment.
+    with _index_lock:
+        fd = _get_log_fd()
+        if os.fstat(fd).st_size >= _ROTATE_BYTES:
+            _rotate()
+            fd = _get_log_fd()
+        if not _index_file(LOG_FILE).exists():
+            _rebuild_index(LOG_FILE)
+        # os.write may take only part of the payload; keep writing the rest
+        # and index just the bytes each call actually appended.
+        ranges: List[Tuple[str, int, int]] = []
+        written = 0
+        try:
+            while written < len(payload):
+                n = os.write(fd, payload[written:])
+                if n <= 0:
+                    raise OSError("activity log write made no progress")
+                lo, hi = written, written + n
+                shift = os.lseek(fd, 0, os.SEEK_CUR) - hi  # payload offset -> file offset
+                for date, start, end in spans:
+                    if start < hi and end > lo:
+                        _add_range(ranges, date, max(start, lo) + shift, min(end, hi) + shift)
+                written = hi
+        finally:
+            if ranges:
+                _write_index(LOG_FILE, ranges)
+
+class _ActivityFileHandler(BufferingHandler):
+    """Buffers JSON records and appends them to the log in batches.
+
+    The buffer is written when it holds _BATCH_MAX records or as soon as the
+    listener queue runs dry, so a burst becomes one write without delaying
+    an isolated entry.
+    """
+
+    def __init__(self, source: "queue.Queue"):
+        super().__init__(_BATCH_MAX)
+        self._source = source
+
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return len(self.buffer) >= self.capacity or self._source.empty()
+
+    def flush(self) -> None:
+        with self.lock:
+            if not self.buffer:
+                return
+            batch = [(r.log_date, r.log_line) for r in self.buffer]
+            try:
+                _write_batch(batch)
+            except OSError:
+                self.handleError(self.buffer[-1])
+            finally:
+                self.buffer.clear()
+
+def _legacy_entries(text: str) -> List[dict]:
+    """Parse the boxed entries of a legacy activity_log.txt."""
+    entries = []
+    for box in text.split("╔")[1:]:
+        fields = {}
+        for line in box.splitlines():
+            body = line.strip().strip("║").strip()
+            for label, key in _LEGACY_FIELDS:
+                if body.startswith(label):
+                    fields[key] = body[len(label):].strip()
+                    break
+        if "date" not in fields:
+            continue
+        time_ = fields.get("time", "").replace("(IST)", "").strip()
+        entries.append({
+            "ts": f"{fields['date']} {time_}",
+            "action": fields.get("action", ""),
+            "details": fields.get("details", ""),
+            "category": fields.get("category", "general"),
+        })
+    return entries
+
+def _migrate_legacy_log() -> None:
+    """Convert a legacy activity_log.txt into JSON lines, once.
+
+    Its entries are older than anything in LOG_FILE, so they go in front;
+    the sidecar index is dropped and rebuilt on next use.
+    """
+    if not _LEGACY_LOG.exists():
+        return
+    try:
+        text = _LEGACY_LOG.read_text(encoding="utf-8")
+        parts = [
+            json.dumps(e, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            for e in _legacy_entries(text)
+        ]
+        if LOG_FILE.exists():
+            parts.append(LOG_FILE.read_bytes())
+        tmp = LOG_FILE.with_suffix(".tmp")
+        tmp.write_bytes(b"".join(parts))
+        os.replace(tmp, LOG_FILE)
+        index = _index_file(LOG_FILE)
+        if index.exists():
+            index.unlink()
+        _LEGACY_LOG.unlink()
+    except (OSError, UnicodeDecodeError):
+        pass  # keep the legacy file; clear_logs still removes it
+
+_migrate_legacy_log()
+
+_queue: "queue.Queue" = queue.Queue(-1)
+_file_handler = _ActivityFileHandler(_queue)
+_listener = QueueListener(_queue, _file_handler)
+_listener.start()
+
+_log = logging.getLogger("timable.activity")
+_log.setLevel(logging.INFO)
+_log.propagate = False
+_log.addHandler(QueueHandler(_queue))
+
+def _flush_log():
+    """Block until every entry logged so far has been written."""
+    _queue.join()
+    _file_handler.flush()
+
+def _load_index(log_path: Path) -> Dict[str, List[Tuple[int, int]]]:
+    """Return date -> merged byte ranges for a segment.
+
+    The index file is append-only, so only the lines added since the last
+    call are parsed. Rotating, rebuilding or clearing drops the cached
+    entry, and a different inode or a shrunken file also starts over, so a
+    recreated index is never read as a continuation of the old one.
+    """
+    path = _index_file(log_path)
+    with _index_lock:
+        if not path.exists():
+            _rebuild_index(log_path)
+        st = path.stat()
+        cached = _index_cache.get(path)
+        if cached is None or cached[0] != st.st_ino or cached[1] > st.st_size:
+            cached = (st.st_ino, 0, {})
+        ino, consumed, index = cached
+        if consumed < st.st_size:
+            with open(path, "rb") as f:
+                f.seek(consumed)
+                chunk = f.read(st.st_size - consumed)
+            chunk = chunk[:chunk.rfind(b"\n") + 1]  # complete lines only
+            for line in chunk.decode("utf-8").splitlines():
+                parts = line.split()
+                if len(parts) != 3:
+                    continue
+                date, start, end = parts[0], int(parts[1]), int(parts[2])
+                spans = index.setdefault(date, [])
+                if spans and spans[-1][1] == start:
+                    spans[-1] = (spans[-1][0], end)
+                else:
+                    spans.append((start, end))
+            consumed += len(chunk)
+        _index_cache[path] = (ino, consumed, index)
+    return index
+
+def _close_log_fd():
+    """Close the shared append descriptor.
+
+    Callers hold _file_handler.lock, so the listener is never part-way
+    through _write_batch with the descriptor being closed.
+    """
+    global _log_fd
+    if _log_fd is not None:
+        os.close(_log_fd)
+        _log_fd = None
+
+def _close_log_handle():
+    """Flush and close the shared append descriptor."""
+    _flush_log()
+    with _file_handler.lock:
+        _close_log_fd()
+
+atexit.register(_close_log_handle)
+
+# Fixed pieces of the boxed entry; only the field values change per entry.
+# Field values are left-justified to _FIELD_WIDTH with str.ljust (never truncated).
+_FIELD_WIDTH = 50
+_BOX_RULE = "═" * 62
+_BOX_HEAD = f"\n╔{_BOX_RULE}╗\n║  ACTIVITY LOG - "
+_BOX_TIME = f"                                   ║\n╠{_BOX_RULE}╣\n║  Time:    "
+_BOX_ACTION = " (IST)                                ║\n║  Action:  "
+_BOX_DETAILS = " ║\n║  Details: "
+_BOX_CATEGORY = " ║\n║  Category: "
+_BOX_TAIL = f" ║\n╚{_BOX_RULE}╝\n"
+
+_READ_CHUNK = 64 * 1024
+
+# Pre-encoded pieces of a stored record, matching
+# json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n".
+# _json_str quotes and escapes each string value.
+_REC_TS = b'{"ts":"'
+_REC_ACTION = b'","action":'
+_REC_DETAILS = b',"details":'
+_REC_CATEGORY = b',"category":'
+_REC_END = b'}\n'
+
+# Entries logged by this process, newest last; serves read_logs without disk I/O
+_RECENT_MAX = 1024
+_recent: deque = deque(maxlen=_RECENT_MAX)
 
 def _get_ist_time():
     """Get current time in IST."""
-    ist = pytz.timezone('Asia/Kolkata')
-    return datetime.now(ist)
+    return datetime.now(IST)
+
+def _format_box(entry: dict) -> str:
+    """Render one stored entry in the boxed, human-readable layout."""
+    ts = entry.get("ts", "")
+    return "".join((
+        _BOX_HEAD, ts[:10],
+        _BOX_TIME, ts[11:],
+        _BOX_ACTION, entry.get("action", "").ljust(_FIELD_WIDTH),
+        _BOX_DETAILS, entry.get("details", "").ljust(_FIELD_WIDTH),
+        _BOX_CATEGORY, entry.get("category", "").ljust(_FIELD_WIDTH),
+        _BOX_TAIL,
+    ))
+
+def _format_entries(lines: List[bytes]) -> str:
+    """Render raw JSON lines as boxes, skipping torn or corrupt lines."""
+    boxes = []
+    for line in lines:
+        try:
+            boxes.append(_format_box(json.loads(line)))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+    return "".join(boxes)
 
 def log_activity(action: str, details: str, category: str = "general"):
     """
-    Log an activity to the text file.
-    
+    Log an activity to the JSON-lines log file.
+
     Args:
         action: Brief action description (e.g., "ADDED_TEACHER", "GENERATED_TIMETABLE")
         details: More details about the action
         category: Category of activity (teacher, class, timetable, system)
     """
-    _ensure_log_dir()
-    
     now = _get_ist_time()
-    timestamp = now.strftime("%Y-%m-%d %I:%M %p IST")
-    date_only = now.strftime("%Y-%m-%d")
-    time_only = now.strftime("%I:%M %p")
-    
-    # Format for easy reading
-    log_entry = f"[{timestamp}] {action}: {details}\n"
-    
-    # Also create a formatted line for the readable format
-    formatted_entry = f"""
-╔══════════════════════════════════════════════════════════════╗
-║  ACTIVITY LOG - {date_only}                                   ║
-╠══════════════════════════════════════════════════════════════╣
-║  Time:    {time_only} (IST)                                ║
-║  Action:  {action:<50} ║
-║  Details: {details:<50} ║
-║  Category: {category:<50} ║
-╚══════════════════════════════════════════════════════════════╝
-"""
-    
-    # Append to log file
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(formatted_entry)
+    hour = now.hour
+    # One formatted stamp; the date is its first ten characters
+    ts = (
+        f"{now.year:04d}-{now.month:02d}-{now.day:02d} "
+        f"{hour % 12 or 12:02d}:{now.minute:02d} {'AM' if hour < 12 else 'PM'}"
+    )
+
+    _recent.append({"ts": ts, "action": action, "details": details, "category": category})
+    line = b"".join((
+        _REC_TS, ts.encode("ascii"),
+        _REC_ACTION, _json_str(action).encode("utf-8"),
+        _REC_DETAILS, _json_str(details).encode("utf-8"),
+        _REC_CATEGORY, _json_str(category).encode("utf-8"),
+        _REC_END,
+    ))
+
+    # Hand off to the queue listener
+    _log.info("", extra={"log_date": ts[:10], "log_line": line})
+
+def _read_tail(log_path: Path, last_n: int) -> List[bytes]:
+    """Return the last_n lines of a log segment.
+
+    Reads backwards in _READ_CHUNK blocks so only the tail is touched.
+    """
+    if last_n <= 0:
+        return []
+    with open(log_path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        buf = b""
+        newlines = 0
+        while pos > 0 and newlines <= last_n:
+            step = min(_READ_CHUNK, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            newlines += chunk.count(b"\n")
+            buf = chunk + buf
+    return buf.splitlines()[-last_n:]
 
 def read_logs(last_n: int = 10) -> str:
     """Read the last N log entries."""
-    if not LOG_FILE.exists():
+    if 0 < last_n <= len(_recent):
+        return "".join(_format_box(e) for e in list(_recent)[-last_n:])
+
+    _flush_log()
+    segments = _segments()
+    if not segments:
         return "No activity logs found."
-    
-    with open(LOG_FILE, "r", encoding="utf-8") as f:
-        content = f.read()
-    
+
+    # Walk segments newest to oldest until enough lines are collected
+    lines: List[bytes] = []
+    for path in segments:
+        lines = _read_tail(path, last_n - len(lines)) + lines
+        if len(lines) >= last_n:
+            break
+    content = _format_entries(lines)
     if not content:
         return "No activity logs found."
-    
-    # Return last N entries (split by ╔)
-    entries = content.split("╔")
-    if len(entries) <= last_n:
-        return content
-    
-    return "╔" + "╔".join(entries[-last_n:])
+
+    return content
 
 def get_logs_by_date(date: str) -> str:
     """Get all logs for a specific date (YYYY-MM-DD format)."""
-    if not LOG_FILE.exists():
+    return get_logs_by_dates([date])
+
+def get_logs_by_dates(dates: List[str]) -> str:
+    """Get all logs for any of the given dates (YYYY-MM-DD format).
+
+    Uses each segment's sidecar index to read only those dates' byte ranges,
+    in file order, so every segment is visited once however many dates are
+    requested.
+    """
+    _flush_log()
+    segments = _segments()
+    if not segments or not dates:
         return "No activity logs found."
-    
-    with open(LOG_FILE, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    if not date in content:
-        return f"No activity logs found for {date}."
-    
-    # Extract entries for the date
-    entries = content.split("╔")
-    matching = [e for e in entries if date in e]
-    
-    if not matching:
-        return f"No activity logs found for {date}."
-    
-    return "╔" + "╔".join(matching)
+
+    wanted = set(dates)
+    lines: List[bytes] = []
+    for path in reversed(segments):
+        index = _load_index(path)
+        spans = sorted(span for date in wanted for span in index.get(date, ()))
+        if not spans:
+            continue
+        with open(path, "rb") as f:
+            for start, end in spans:
+                f.seek(start)
+                lines.extend(f.read(end - start).splitlines())
+    content = _format_entries(lines)
+
+    if not content:
+        return f"No activity logs found for {', '.join(dates)}."
+
+    return content
 
 def clear_logs():
     """Clear all logs."""
-    if LOG_FILE.exists():
-        LOG_FILE.unlink()
+    _flush_log()
+    # Holding the handler lock keeps the listener out of _write_batch while
+    # the descriptor is closed and the segments are removed.
+    with _file_handler.lock:
+        _close_log_fd()
+        _recent.clear()
+        with _index_lock:
+            for n in range(_ROTATE_KEEP + 1):
+                for path in (_segment(n), _index_file(_segment(n))):
+                    if path.exists():
+                        path.unlink()
+            if _LEGACY_LOG.exists():
+                _LEGACY_LOG.unlink()
+            # A recreated index may reuse a freed inode; never resume the old one
+            _index_cache.clear()
 
-# Predefined activity constants
+# Predefined activity constants (read-only namespace; never instantiated)
 class Activities:
     # Teacher activities
-    TEACHER_ADDED = "TEACHER_ADDED"
-    TEACHER_REMOVED = "TEACHER_REMOVED"
-    TEACHER_UPDATED = "TEACHER_UPDATED"
+    TEACHER_ADDED: Final = "TEACHER_ADDED"
+    TEACHER_REMOVED: Final = "TEACHER_REMOVED"
+    TEACHER_UPDATED: Final = "TEACHER_UPDATED"
     
     # Class activities
-    CLASS_ADDED = "CLASS_ADDED"
-    CLASS_REMOVED = "CLASS_REMOVED"
-    CLASS_UPDATED = "CLASS_UPDATED"
+    CLASS_ADDED: Final = "CLASS_ADDED"
+    CLASS_REMOVED: Final = "CLASS_REMOVED"
+    CLASS_UPDATED: Final = "CLASS_UPDATED"
     
     # Timetable activities
-    TIMETABLE_GENERATED = "TIMETABLE_GENERATED"
-    TIMETABLE_CLEARED = "TIMETABLE_CLEARED"
-    TIMETABLE_EXPORTED = "TIMETABLE_EXPORTED"
+    TIMETABLE_GENERATED: Final = "TIMETABLE_GENERATED"
+    TIMETABLE_CLEARED: Final = "TIMETABLE_CLEARED"
+    TIMETABLE_EXPORTED: Final = "TIMETABLE_EXPORTED"
     
     # Configuration activities
-    CONFIG_UPDATED = "CONFIG_UPDATED"
-    DEMO_LOADED = "DEMO_LOADED"
-    DATA_CLEARED = "DATA_CLEARED"
+    CONFIG_UPDATED: Final = "CONFIG_UPDATED"
+    DEMO_LOADED: Final = "DEMO_LOADED"
+    DATA_CLEARED: Final = "DATA_CLEARED"
     
     # System
-    APP_STARTED = "APP_STARTED"
-    APP_ERROR = "APP_ERROR"
+    APP_STARTED: Final = "APP_STARTED"
+    APP_ERROR: Final = "APP_ERROR"
@@ -9,27 +9,23 @@ Clean rebuild of the main app:
 
 from __future__ import annotations
 
-import copy
-from datetime import timedelta
-from typing import Dict, List, Tuple
+import math
+import time
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Tuple, TypeVar
 
 import activity_logger as logger
-from activity_logger import Activities
+from activity_logger import IST, Activities
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 
 from models import Class, ClassPriorityConfig, ClassSubject, SchoolConfig, Teacher
-import plotly.express as px
+import plotly.graph_objects as go
 
-from pdf_export import (
-    export_class_timetables_pdf,
-    export_teacher_timetables_pdf,
-    flat_to_class_timetables,
-)
-from solver.engine import invert_to_teacher_timetable, solve_timetable
-from solver.rotation import generate_rotations
 from storage import (
     append_history,
     clear_base_timetable,
@@ -95,13 +91,12 @@ ANIMATION_CSS = """
         padding: 4px;
         border: 1px solid #30363d;
         box-shadow: 0 0 0 1px rgba(240,246,252,0.02);
-        transition: all 0.15s ease;
     }
     .stTabs [data-baseweb="tab"] {
         background-color: transparent;
         color: #8b949e;
         border-radius: 6px;
-        transition: all 0.15s ease;
+        transition: color 0.15s ease, background-color 0.15s ease;
     }
     .stTabs [data-baseweb="tab"]:hover {
         color: #ffffff;
@@ -112,6 +107,11 @@ ANIMATION_CSS = """
         color: #ffffff !important;
         box-shadow: 0 0 0 1px #f0f6fc;
     }
+    /* Containment: keep big grids/charts from relaying out the page */
+    [data-testid="stDataFrame"],
+    [data-testid="stPlotlyChart"] {
+        contain: layout paint;
+    }
 
     /* Toasts */
     .toast-item {
@@ -133,12 +133,13 @@ ANIMATION_CSS = """
         from { opacity: 0; transform: translateY(-3px); }
         to   { opacity: 1; transform: translateY(0); }
     }
+    #notification-slot { contain: layout paint; }
     .toast-msg { flex: 1; }
     .toast-countdown { font-size: 11px; color: #8b949e; min-width: 24px; }
 
     /* Buttons */
     button {
-        transition: transform 0.15s ease, box-shadow 0.15s ease !important;
+        transition: transform 0.15s ease !important;
         border-radius: 6px !important;
         border: 1px solid #30363d !important;
     }
@@ -189,10 +190,13 @@ st.markdown(ANIMATION_CSS, unsafe_allow_html=True)
 # ---------------------------------------------------------------------------
 
 Timetable = Dict[Tuple[str, int, int], Tuple[str, str]]
+T = TypeVar("T")
 
 
 def deep_copy_tt(tt: Timetable | None) -> Timetable | None:
-    return copy.deepcopy(tt) if tt is not None else None
+    # Keys and (subject, teacher) values are immutable tuples, so a new
+    # top-level dict is an independent copy; the cells are shared.
+    return dict(tt) if tt is not None else None
 
 
 def _shorten(text: str, max_len: int = 20) -> str:
@@ -202,6 +206,28 @@ def _shorten(text: str, max_len: int = 20) -> str:
     return text if len(text) <= max_len else text[: max_len - 1] + "…"
 
 
+def _per_timetable(name: str, build: Callable[[], T]) -> T:
+    """Return build(), reusing the result across reruns.
+
+    Everything memoised here is derived from the class/teacher timetables
+    and the config. The cache is emptied whenever one of those objects
+    changes, so reruns triggered by unrelated widgets skip the rebuild.
+    """
+    ss = st.session_state
+    sig = ss.get("per_timetable_sig")
+    if (
+        sig is None
+        or sig[0] is not ss.class_timetable
+        or sig[1] is not ss.teacher_timetable
+        or sig[2] != ss.config
+    ):
+        ss.per_timetable_sig = (ss.class_timetable, ss.teacher_timetable, ss.config)
+        ss.per_timetable = {}
+    if name not in ss.per_timetable:
+        ss.per_timetable[name] = build()
+    return ss.per_timetable[name]
+
+
 def _init_session() -> None:
     if "initialized" in st.session_state:
         return
@@ -225,31 +251,28 @@ def _init_session() -> None:
 def show_toast(msg: str, duration_sec: int = 3) -> None:
     uid = f"n_{len(st.session_state.notifications)}_{hash(msg)}"
     st.session_state.notifications.append(
-        {"msg": msg, "until": timedelta(seconds=duration_sec), "id": uid}
+        {"msg": msg, "until": time.monotonic() + duration_sec, "id": uid}
     )
 
 
 @st.fragment(run_every=timedelta(seconds=1))
 def _notification_ticker() -> None:
-    now = timedelta(seconds=0)
-    notifications = st.session_state.get("notifications", [])
-    active: List[dict] = []
-
-    for n in notifications:
-        remaining = n["until"] - timedelta(seconds=1)
-        if remaining > now:
-            n["until"] = remaining
-            active.append(n)
-
+    # Expiry is an absolute deadline, so full-app reruns (which also run
+    # this fragment) don't shorten a toast the way a per-call countdown did.
+    now = time.monotonic()
+    active = [n for n in st.session_state.get("notifications", []) if n["until"] > now]
     st.session_state.notifications = active
 
-    for n in active:
-        secs = int(n["until"].total_seconds())
-        st.markdown(
-            f"<div class='toast-item'><span class='toast-msg'>{n['msg']}</span>"
-            f"<span class='toast-countdown'>{secs}s</span></div>",
-            unsafe_allow_html=True,
-        )
+    if not active:
+        return
+
+    # One element for all toasts, so each tick is a single frontend update.
+    html = "".join(
+        f"<div class='toast-item'><span class='toast-msg'>{n['msg']}</span>"
+        f"<span class='toast-countdown'>{math.ceil(n['until'] - now)}s</span></div>"
+        for n in active
+    )
+    st.markdown(f"<div id='notification-slot'>{html}</div>", unsafe_allow_html=True)
 
 
 # ---------------------------------------------------------------------------
@@ -257,9 +280,10 @@ def _notification_ticker() -> None:
 # ---------------------------------------------------------------------------
 
 
-def load_demo_into_session() -> None:
-    """Populate in‑memory teachers/classes with the README demo."""
-    st.session_state.teachers = [
+@st.cache_resource
+def _demo_teachers() -> List[Teacher]:
+    """README demo teachers, built once per process (Teacher is frozen; copy the list)."""
+    return [
         Teacher(
             teacher_id="Eric Simon",
             name="Eric Simon",
@@ -358,6 +382,11 @@ def load_demo_into_session() -> None:
         ),
     ]
 
+
+@st.cache_resource
+def _demo_classes() -> List[Class]:
+    """README demo classes, built once per process (Class is frozen; copy the list)."""
+
     def cls(cid: str, subjects: List[Tuple[str, int, str]]) -> Class:
         return Class(
             id=cid,
@@ -365,7 +394,7 @@ def load_demo_into_session() -> None:
             subjects=[ClassSubject(s, w, t) for (s, w, t) in subjects],
         )
 
-    st.session_state.classes = [
+    return [
         cls(
             "11SCI",
             [
@@ -390,6 +419,13 @@ def load_demo_into_session() -> None:
         ),
     ]
 
+
+def load_demo_into_session() -> None:
+    """Populate in‑memory teachers/classes with the README demo."""
+    # The session edits these lists in place; the shared cached lists stay intact
+    st.session_state.teachers = list(_demo_teachers())
+    st.session_state.classes = list(_demo_classes())
+
     save_teachers(st.session_state.teachers)
     save_classes(st.session_state.classes)
     show_toast("Demo data loaded (teachers + classes)")
@@ -439,14 +475,20 @@ def render_sidebar() -> None:
                         breaks[idx] = parts[1]
                     except ValueError:
                         continue
-            st.session_state.config = SchoolConfig(
+            new_cfg = SchoolConfig(
                 days=days or cfg.days,
                 periods_per_day=int(periods),
                 break_periods=breaks or cfg.break_periods,
             )
-            save_config(st.session_state.config)
-            logger.log_activity(Activities.CONFIG_UPDATED, f"Updated: {days} days, {periods} periods/day, {len(breaks)} breaks", "system")
-            show_toast("Config saved")
+            # Re-submitting the same values keeps the current config object,
+            # so nothing is rewritten and the per-config caches stay warm.
+            if new_cfg == cfg:
+                show_toast("Config unchanged")
+            else:
+                st.session_state.config = new_cfg
+                save_config(new_cfg)
+                logger.log_activity(Activities.CONFIG_UPDATED, f"Updated: {days} days, {periods} periods/day, {len(breaks)} breaks", "system")
+                show_toast("Config saved")
 
     st.sidebar.markdown("---")
     with st.sidebar.expander("🧪 Demo / Testing"):
@@ -469,6 +511,170 @@ def render_sidebar() -> None:
 # ---------------------------------------------------------------------------
 
 
+# Save/remove buttons use on_click callbacks, which run before the rerun the
+# click triggers. Each row is a fragment, so that rerun covers only the row;
+# the callbacks set roster_changed and the row escalates to one app rerun so
+# every tab renders the updated lists.
+
+
+def _close_editor(flag_key: str) -> None:
+    st.session_state[flag_key] = False
+
+
+def _save_teacher_edit(i: int) -> None:
+    t = st.session_state.teachers[i]
+    new_name = st.session_state[f"edit_name_{i}"]
+    new_subjects = st.session_state[f"edit_subj_{i}"]
+    st.session_state.teachers[i] = replace(
+        t,
+        teacher_id=new_name.strip(),
+        name=new_name.strip(),
+        subjects=[s.strip() for s in new_subjects.split(",") if s.strip()],
+        max_periods_per_day=int(st.session_state[f"edit_max_{i}"]),
+        target_free_periods_per_day=int(st.session_state[f"edit_free_{i}"]),
+    )
+    save_teachers(st.session_state.teachers)
+    show_toast(f"Teacher '{new_name}' updated!")
+    logger.log_activity(Activities.TEACHER_UPDATED, f"Teacher '{t.teacher_id}' updated to '{new_name}'", "teacher")
+    st.session_state[f"editing_teacher_{i}"] = False
+    st.session_state.roster_changed = True
+
+
+def _remove_teacher(i: int) -> None:
+    removed = st.session_state.teachers.pop(i)
+    save_teachers(st.session_state.teachers)
+    show_toast(f"Teacher {removed.teacher_id} removed")
+    logger.log_activity(Activities.TEACHER_REMOVED, f"Teacher '{removed.teacher_id}' removed", "teacher")
+    append_history(
+        "delete",
+        f"Teacher {removed.teacher_id}",
+        f"Removed teacher {removed.teacher_id}",
+    )
+    st.session_state.roster_changed = True
+
+
+def _save_class_edit(i: int) -> None:
+    c = st.session_state.classes[i]
+    new_id = st.session_state[f"edit_class_id_{i}"]
+    # Parse subjects
+    new_subjects = []
+    for line in st.session_state[f"edit_class_subj_{i}"].splitlines():
+        parts = [p.strip() for p in line.split(",")]
+        if len(parts) >= 3:
+            try:
+                new_subjects.append(ClassSubject(
+                    subject=parts[0],
+                    weekly_periods=int(parts[1]),
+                    teacher_id=parts[2]
+                ))
+            except ValueError:
+                continue
+    st.session_state.classes[i] = replace(
+        c, id=new_id.strip(), name=new_id.strip(), subjects=new_subjects
+    )
+    save_classes(st.session_state.classes)
+    show_toast(f"Class '{new_id}' updated!")
+    logger.log_activity(Activities.CLASS_UPDATED, f"Class '{c.id}' updated to '{new_id}'", "class")
+    st.session_state[f"editing_class_{i}"] = False
+    st.session_state.roster_changed = True
+
+
+def _remove_class(i: int) -> None:
+    removed = st.session_state.classes.pop(i)
+    save_classes(st.session_state.classes)
+    show_toast(f"Class {removed.id} removed")
+    logger.log_activity(Activities.CLASS_REMOVED, f"Class '{removed.id}' removed", "class")
+    append_history(
+        "delete",
+        f"Class {removed.id}",
+        f"Removed class {removed.id}",
+    )
+    st.session_state.roster_changed = True
+
+
+@st.fragment
+def _teacher_row(i: int) -> None:
+    """One teacher row and its inline editor.
+
+    Opening, editing and cancelling the editor rerun only this row.
+    """
+    if st.session_state.pop("roster_changed", False):
+        # A save/remove callback just ran: rerun the whole app so the
+        # other tabs (and row indices) pick up the change.
+        st.rerun()
+    t = st.session_state.teachers[i]
+    cols = st.columns([4, 1, 1])
+    with cols[0]:
+        subjects = ", ".join(t.subjects) if isinstance(t.subjects, list) else str(
+            t.subjects
+        )
+        st.markdown(
+            f"**{t.teacher_id}** — {subjects or 'No subjects yet'} "
+            f"(max {t.max_periods_per_day}/day)"
+        )
+    with cols[1]:
+        if st.button("✏️ Edit", key=f"edit_teacher_{i}"):
+            st.session_state[f"editing_teacher_{i}"] = True
+
+        # Handle edit mode
+        if st.session_state.get(f"editing_teacher_{i}", False):
+            with st.expander(f"Editing: {t.teacher_id}", expanded=True):
+                st.text_input("Name / ID", value=t.teacher_id, key=f"edit_name_{i}")
+                st.text_input("Subjects (comma-separated)", value=", ".join(t.subjects), key=f"edit_subj_{i}")
+                col_m1, col_m2 = st.columns(2)
+                with col_m1:
+                    st.number_input("Max periods/day", min_value=0, max_value=12, value=t.max_periods_per_day, key=f"edit_max_{i}")
+                with col_m2:
+                    st.number_input("Free periods/day", min_value=0, max_value=12, value=getattr(t, 'target_free_periods_per_day', 0), key=f"edit_free_{i}")
+
+                col_e1, col_e2 = st.columns(2)
+                with col_e1:
+                    st.button("💾 Save", key=f"save_teacher_{i}", on_click=_save_teacher_edit, args=(i,))
+                with col_e2:
+                    st.button("Cancel", key=f"cancel_teacher_{i}", on_click=_close_editor, args=(f"editing_teacher_{i}",))
+    with cols[2]:
+        st.button("🗑️", key=f"rm_teacher_{i}", on_click=_remove_teacher, args=(i,))
+
+
+@st.fragment
+def _class_row(i: int) -> None:
+    """One class row and its inline editor (see _teacher_row)."""
+    if st.session_state.pop("roster_changed", False):
+        # A save/remove callback just ran: rerun the whole app so the
+        # other tabs (and row indices) pick up the change.
+        st.rerun()
+    c = st.session_state.classes[i]
+    subj_str = ", ".join(
+        f"{cs.subject}({cs.weekly_periods}w → {cs.teacher_id})"
+        for cs in c.subjects
+    ) or "No subjects yet"
+    cols = st.columns([4, 1, 1])
+    with cols[0]:
+        st.markdown(f"**{c.id}** — {subj_str}")
+    with cols[1]:
+        if st.button("✏️ Edit", key=f"edit_class_btn_{i}"):
+            st.session_state[f"editing_class_{i}"] = True
+
+        # Handle edit mode
+        if st.session_state.get(f"editing_class_{i}", False):
+            with st.expander(f"Editing: {c.id}", expanded=True):
+                st.text_input("Class ID", value=c.id, key=f"edit_class_id_{i}")
+                st.markdown("**Subjects (one per line: subject,periods,teacher)**")
+                subj_lines_edit = "\n".join(
+                    f"{cs.subject},{cs.weekly_periods},{cs.teacher_id}"
+                    for cs in c.subjects
+                )
+                st.text_area("Subjects", value=subj_lines_edit, key=f"edit_class_subj_{i}", height=150)
+
+                col_e1, col_e2 = st.columns(2)
+                with col_e1:
+                    st.button("💾 Save", key=f"save_class_{i}", on_click=_save_class_edit, args=(i,))
+                with col_e2:
+                    st.button("Cancel", key=f"cancel_class_{i}", on_click=_close_editor, args=(f"editing_class_{i}",))
+    with cols[2]:
+        st.button("🗑️", key=f"rm_class_{i}", on_click=_remove_class, args=(i,))
+
+
 def tab_teachers_classes() -> None:
     st.header("Teachers & Classes")
 
@@ -529,61 +735,8 @@ def tab_teachers_classes() -> None:
                 append_history("add", f"Teacher {t_id}", f"Added teacher {t_id}")
 
     if st.session_state.teachers:
-        for i, t in enumerate(st.session_state.teachers):
-            cols = st.columns([4, 1, 1])
-            with cols[0]:
-                subjects = ", ".join(t.subjects) if isinstance(t.subjects, list) else str(
-                    t.subjects
-                )
-                st.markdown(
-                    f"**{t.teacher_id}** — {subjects or 'No subjects yet'} "
-                    f"(max {t.max_periods_per_day}/day)"
-                )
-            with cols[1]:
-                if st.button("✏️ Edit", key=f"edit_teacher_{i}"):
-                    st.session_state[f"editing_teacher_{i}"] = True
-                    
-                # Handle edit mode
-                if st.session_state.get(f"editing_teacher_{i}", False):
-                    with st.expander(f"Editing: {t.teacher_id}", expanded=True):
-                        new_name = st.text_input("Name / ID", value=t.teacher_id, key=f"edit_name_{i}")
-                        new_subjects = st.text_input("Subjects (comma-separated)", value=", ".join(t.subjects), key=f"edit_subj_{i}")
-                        col_m1, col_m2 = st.columns(2)
-                        with col_m1:
-                            new_max_day = st.number_input("Max periods/day", min_value=0, max_value=12, value=t.max_periods_per_day, key=f"edit_max_{i}")
-                        with col_m2:
-                            new_target_free = st.number_input("Free periods/day", min_value=0, max_value=12, value=getattr(t, 'target_free_periods_per_day', 0), key=f"edit_free_{i}")
-                        
-                        col_e1, col_e2 = st.columns(2)
-                        with col_e1:
-                            if st.button("💾 Save", key=f"save_teacher_{i}"):
-                                old_name = t.teacher_id
-                                t.teacher_id = new_name.strip()
-                                t.name = new_name.strip()
-                                t.subjects = [s.strip() for s in new_subjects.split(",") if s.strip()]
-                                t.max_periods_per_day = int(new_max_day)
-                                t.target_free_periods_per_day = int(new_target_free)
-                                save_teachers(st.session_state.teachers)
-                                show_toast(f"Teacher '{new_name}' updated!")
-                                logger.log_activity(Activities.TEACHER_UPDATED, f"Teacher '{old_name}' updated to '{new_name}'", "teacher")
-                                st.session_state[f"editing_teacher_{i}"] = False
-                                st.rerun()
-                        with col_e2:
-                            if st.button("Cancel", key=f"cancel_teacher_{i}"):
-                                st.session_state[f"editing_teacher_{i}"] = False
-                                st.rerun()
-            with cols[2]:
-                if st.button("🗑️", key=f"rm_teacher_{i}"):
-                    removed = st.session_state.teachers.pop(i)
-                    save_teachers(st.session_state.teachers)
-                    show_toast(f"Teacher {removed.teacher_id} removed")
-                    logger.log_activity(Activities.TEACHER_REMOVED, f"Teacher '{removed.teacher_id}' removed", "teacher")
-                    append_history(
-                        "delete",
-                        f"Teacher {removed.teacher_id}",
-                        f"Removed teacher {removed.teacher_id}",
-                    )
-                    st.rerun()
+        for i in range(len(st.session_state.teachers)):
+            _teacher_row(i)
     else:
         st.info("No teachers yet. Add a few above.")
 
@@ -622,70 +775,8 @@ def tab_teachers_classes() -> None:
                 append_history("add", f"Class {cid}", f"Added class {cid}")
 
     if st.session_state.classes:
-        for i, c in enumerate(st.session_state.classes):
-            subj_str = ", ".join(
-                f"{cs.subject}({cs.weekly_periods}w → {cs.teacher_id})"
-                for cs in c.subjects
-            ) or "No subjects yet"
-            cols = st.columns([4, 1, 1])
-            with cols[0]:
-                st.markdown(f"**{c.id}** — {subj_str}")
-            with cols[1]:
-                if st.button("✏️ Edit", key=f"edit_class_btn_{i}"):
-                    st.session_state[f"editing_class_{i}"] = True
-                    
-                # Handle edit mode
-                if st.session_state.get(f"editing_class_{i}", False):
-                    with st.expander(f"Editing: {c.id}", expanded=True):
-                        new_id = st.text_input("Class ID", value=c.id, key=f"edit_class_id_{i}")
-                        st.markdown("**Subjects (one per line: subject,periods,teacher)**")
-                        subj_lines_edit = "\n".join(
-                            f"{cs.subject},{cs.weekly_periods},{cs.teacher_id}"
-                            for cs in c.subjects
-                        )
-                        new_subj_lines = st.text_area("Subjects", value=subj_lines_edit, key=f"edit_class_subj_{i}", height=150)
-                        
-                        col_e1, col_e2 = st.columns(2)
-                        with col_e1:
-                            if st.button("💾 Save", key=f"save_class_{i}"):
-                                old_id = c.id
-                                c.id = new_id.strip()
-                                c.name = new_id.strip()
-                                # Parse subjects
-                                new_subjects = []
-                                for line in new_subj_lines.splitlines():
-                                    parts = [p.strip() for p in line.split(",")]
-                                    if len(parts) >= 3:
-                                        try:
-                                            new_subjects.append(ClassSubject(
-                                                subject=parts[0],
-                                                weekly_periods=int(parts[1]),
-                                                teacher_id=parts[2]
-                                            ))
-                                        except ValueError:
-                                            continue
-                                c.subjects = new_subjects
-                                save_classes(st.session_state.classes)
-                                show_toast(f"Class '{new_id}' updated!")
-                                logger.log_activity(Activities.CLASS_UPDATED, f"Class '{old_id}' updated to '{new_id}'", "class")
-                                st.session_state[f"editing_class_{i}"] = False
-                                st.rerun()
-                        with col_e2:
-                            if st.button("Cancel", key=f"cancel_class_{i}"):
-                                st.session_state[f"editing_class_{i}"] = False
-                                st.rerun()
-            with cols[2]:
-                if st.button("🗑️", key=f"rm_class_{i}"):
-                    removed = st.session_state.classes.pop(i)
-                    save_classes(st.session_state.classes)
-                    show_toast(f"Class {removed.id} removed")
-                    logger.log_activity(Activities.CLASS_REMOVED, f"Class '{removed.id}' removed", "class")
-                    append_history(
-                        "delete",
-                        f"Class {removed.id}",
-                        f"Removed class {removed.id}",
-                    )
-                    st.rerun()
+        for i in range(len(st.session_state.classes)):
+            _class_row(i)
     else:
         st.info("No classes yet. Add a few above.")
 
@@ -708,6 +799,109 @@ def tab_history() -> None:
                 st.caption(details)
 
 
+@st.cache_resource(show_spinner=False)
+def _period_headers(
+    periods_per_day: int, breaks: Tuple[Tuple[int, str], ...]
+) -> Tuple[List[str], dict]:
+    # cache_resource hands back the same objects instead of unpickling a
+    # fresh copy per call, so callers must treat the result as read-only.
+    break_names = dict(breaks)
+    period_cols = [
+        f"P{p+1}" + (f" ({break_names[p]})" if p in break_names else "")
+        for p in range(periods_per_day)
+    ]
+    col_config = {"Day": st.column_config.TextColumn("Day", width="medium")}
+    for pc in period_cols:
+        col_config[pc] = st.column_config.TextColumn(pc, width="large")
+    return period_cols, col_config
+
+
+def _period_columns(cfg: SchoolConfig) -> Tuple[List[str], dict]:
+    """Period column labels and dataframe column_config for cfg, cached per config."""
+    return _period_headers(cfg.periods_per_day, tuple(sorted(cfg.break_periods.items())))
+
+
+# Below this many rows the per-column dictionaries cost more payload than
+# the repeated labels they replace (measured break-even: ~40 rows).
+_DICTIONARY_MIN_ROWS = 40
+
+
+def _string_table(rows: List[List[str]], columns: List[str]) -> pa.Table:
+    """All-string Arrow table from row lists.
+
+    st.dataframe serialises an Arrow table as-is, whereas a DataFrame goes
+    through pandas dtype inference and an Arrow conversion on every rerun.
+    Large tables are dictionary-encoded (categorical), since subjects and
+    class/teacher labels repeat across rows.
+    """
+    cols = list(zip(*rows)) or [()] * len(columns)
+    arrays = [pa.array(col, type=pa.string()) for col in cols]
+    if len(rows) >= _DICTIONARY_MIN_ROWS:
+        arrays = [a.dictionary_encode() for a in arrays]
+    return pa.table(dict(zip(columns, arrays)))
+
+
+def _class_timetable_table(tt: Timetable, cfg: SchoolConfig) -> pa.Table:
+    """All classes in one Class/Day × period table, sorted by class id."""
+    breaks = cfg.break_periods
+    n_days, n_periods = len(cfg.days), cfg.periods_per_day
+    period_cols, _ = _period_columns(cfg)
+
+    # Fill every class's day × period grid in one pass over the timetable,
+    # rather than probing each (class, day, period) key per class.
+    blank = [breaks.get(p, "Free period") for p in range(n_periods)]
+    # Subjects repeat across cells: shorten each distinct one only once
+    labels: Dict[str, str] = {}
+    grids: Dict[str, List[List[str]]] = {}
+    for key, (subj, _) in tt.items():
+        # Keys should be (class_id, day, period) tuples, but be defensive.
+        if not isinstance(key, (tuple, list)) or len(key) != 3:
+            continue
+        cid, d, p = key
+        grid = grids.get(cid)
+        if grid is None:
+            grid = grids[cid] = [list(blank) for _ in range(n_days)]
+        if d < n_days and p < n_periods and p not in breaks:
+            label = labels.get(subj)
+            if label is None:
+                label = labels[subj] = _shorten(subj or "Free period", 18)
+            grid[d][p] = label
+
+    return _string_table(
+        [
+            [cid, day_name] + cells
+            for cid in sorted(grids)
+            for day_name, cells in zip(cfg.days, grids[cid])
+        ],
+        ["Class", "Day"] + period_cols,
+    )
+
+
+class _NoSolution(Exception):
+    """Raised by _solve_cached so a failed solve is never cached."""
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _solve_cached(
+    cfg: SchoolConfig, teachers: List[Teacher], classes: List[Class]
+) -> Timetable:
+    """solve_timetable memoised on its inputs.
+
+    Generating again with unchanged config, teachers and classes returns
+    the previous solution instead of running CP-SAT again. When no solution
+    is found (possibly just a solver timeout) _NoSolution is raised instead
+    of returning None, since st.cache_data does not cache exceptions and
+    the next Generate then solves afresh.
+    """
+    # Imported here: OR-Tools is only needed once a timetable is generated.
+    from solver.engine import solve_timetable
+
+    tt = solve_timetable(cfg, teachers, classes)
+    if tt is None:
+        raise _NoSolution
+    return tt
+
+
 def tab_class_timetables() -> None:
     st.header("Class Timetables")
     cfg: SchoolConfig = st.session_state.config
@@ -720,15 +914,20 @@ def tab_class_timetables() -> None:
             st.error("Add at least one class first.")
             return
         with st.spinner("Solving with OR‑Tools..."):
-            tt = solve_timetable(
-                cfg, st.session_state.teachers, st.session_state.classes
-            )
+            try:
+                tt = _solve_cached(
+                    cfg, st.session_state.teachers, st.session_state.classes
+                )
+            except _NoSolution:
+                tt = None
         if tt is None:
             st.error("No solution found. Try changing config or weekly periods.")
             append_history("generate", "Timetable", "No solution found")
             logger.log_activity(Activities.TIMETABLE_GENERATED, "Failed: No solution found", "timetable")
             return
 
+        from solver.engine import invert_to_teacher_timetable
+
         st.session_state.class_timetable = tt
         st.session_state.teacher_timetable = invert_to_teacher_timetable(tt, cfg)
         save_base_timetable(tt)
@@ -740,40 +939,47 @@ def tab_class_timetables() -> None:
         st.info("Generate a timetable to see class views.")
         return
 
-    # Keys should be (class_id, day, period) tuples, but be defensive.
-    keys = list(st.session_state.class_timetable.keys())
-    class_ids = sorted(
-        {k[0] for k in keys if isinstance(k, (tuple, list)) and len(k) >= 1}
+    _, col_config = _period_columns(cfg)
+    table = _per_timetable(
+        "class_table", lambda: _class_timetable_table(st.session_state.class_timetable, cfg)
+    )
+    # One grid for every class: a single dataframe element costs one
+    # frontend component instead of a subheader + grid per class.
+    st.dataframe(
+        table,
+        column_config={"Class": st.column_config.TextColumn("Class", width="small"), **col_config},
+        width="stretch",
+        height="content",
+        hide_index=True,
     )
-    breaks = cfg.break_periods
-    period_cols = [
-        f"P{p+1}" + (f" ({breaks[p]})" if p in breaks else "")
-        for p in range(cfg.periods_per_day)
-    ]
 
-    col_config = {"Day": st.column_config.TextColumn("Day", width="medium")}
-    for pc in period_cols:
-        col_config[pc] = st.column_config.TextColumn(pc, width="large")
 
-    for cid in class_ids:
-        st.subheader(f"Class {cid}")
-        rows = []
-        for d, day_name in enumerate(cfg.days):
-            row = [day_name]
-            for p in range(cfg.periods_per_day):
-                if p in breaks:
-                    row.append(breaks[p])
-                else:
-                    val = st.session_state.class_timetable.get((cid, d, p), ("", ""))[0]
-                    cell = val or "Free period"
-                    row.append(_shorten(cell, 18))
-            rows.append(row)
-        st.dataframe(
-            pd.DataFrame(rows, columns=["Day"] + period_cols),
-            column_config=col_config,
-            width="stretch",
-            hide_index=True,
-        )
+def _teacher_timetable_frames(
+    teacher_tt: Dict[str, Dict[Tuple[int, int], Tuple[str, str]]], cfg: SchoolConfig
+) -> List[Tuple[str, pa.Table]]:
+    """One Day × period table per teacher, sorted by teacher id."""
+    breaks = cfg.break_periods
+    n_days, n_periods = len(cfg.days), cfg.periods_per_day
+    period_cols, _ = _period_columns(cfg)
+    blank = [breaks.get(p, "Free period") for p in range(n_periods)]
+    # (class, subject) pairs repeat within and across teachers: shorten once
+    labels: Dict[Tuple[str, str], str] = {}
+
+    frames = []
+    for tid, tt in sorted(teacher_tt.items()):
+        # Start from breaks / free periods and fill only the slots this
+        # teacher actually teaches, instead of probing every day × period.
+        grid = [list(blank) for _ in range(n_days)]
+        for (d, p), cell in tt.items():
+            if d < n_days and p < n_periods and p not in breaks:
+                label = labels.get(cell)
+                if label is None:
+                    cid, subj = cell
+                    label = labels[cell] = _shorten(f"{cid}: {subj}" if subj else "Free period", 22)
+                grid[d][p] = label
+        rows = [[day_name] + cells for day_name, cells in zip(cfg.days, grid)]
+        frames.append((tid, _string_table(rows, ["Day"] + period_cols)))
+    return frames
 
 
 def tab_teacher_timetables() -> None:
@@ -783,36 +989,45 @@ def tab_teacher_timetables() -> None:
         return
 
     cfg: SchoolConfig = st.session_state.config
-    breaks = cfg.break_periods
-    period_cols = [
-        f"P{p+1}" + (f" ({breaks[p]})" if p in breaks else "")
-        for p in range(cfg.periods_per_day)
-    ]
-    col_config = {"Day": st.column_config.TextColumn("Day", width="medium")}
-    for pc in period_cols:
-        col_config[pc] = st.column_config.TextColumn(pc, width="large")
-
-    for tid, tt in sorted(st.session_state.teacher_timetable.items()):
+    _, col_config = _period_columns(cfg)
+    frames = _per_timetable(
+        "teacher_frames",
+        lambda: _teacher_timetable_frames(st.session_state.teacher_timetable, cfg),
+    )
+    for tid, df in frames:
         st.subheader(f"Teacher {tid}")
-        rows = []
-        for d, day_name in enumerate(cfg.days):
-            row = [day_name]
-            for p in range(cfg.periods_per_day):
-                if p in breaks:
-                    row.append(breaks[p])
-                else:
-                    cid, subj = tt.get((d, p), ("", ""))
-                    cell = f"{cid}: {subj}" if subj else "Free period"
-                    row.append(_shorten(cell, 22))
-            rows.append(row)
         st.dataframe(
-            pd.DataFrame(rows, columns=["Day"] + period_cols),
+            df,
             column_config=col_config,
             width="stretch",
             hide_index=True,
         )
 
 
+def _period_label(p: int) -> str:
+    return f"P{p+1}"
+
+
+def _slot_lessons() -> Dict[Tuple[int, int], List[Tuple[str, str, str]]]:
+    """(day, period) -> [(class_id, subject, teacher_id)], built once per timetable.
+
+    Lets the slot lookups below read one bucket instead of scanning the
+    whole timetable on every pick.
+    """
+
+    def build() -> Dict[Tuple[int, int], List[Tuple[str, str, str]]]:
+        slots: Dict[Tuple[int, int], List[Tuple[str, str, str]]] = {}
+        for (cid, d, p), (subj, tid) in st.session_state.class_timetable.items():
+            slots.setdefault((d, p), []).append((cid, subj, tid))
+        return slots
+
+    return _per_timetable("slot_lessons", build)
+
+
+# The Substitution and Free Teacher tabs only read the timetable, so they
+# run as fragments: picking a day/period or clicking Find reruns just that
+# tab instead of every tab in the app.
+@st.fragment
 def tab_substitution() -> None:
     """Smart Substitution - Find best substitute for absent teacher."""
     st.header("🔄 Smart Substitution")
@@ -824,21 +1039,18 @@ def tab_substitution() -> None:
         st.info("Please generate a timetable first!")
         return
     
+    # Options are indices shown through format_func, so the picked day and
+    # period come back as indices without a list scan or label parsing.
     col1, col2 = st.columns(2)
     with col1:
-        absent_day = st.selectbox("Select Day", cfg.days, key="absent_day")
+        day_idx = st.selectbox("Select Day", range(len(cfg.days)), format_func=cfg.days.__getitem__, key="absent_day")
     with col2:
-        absent_period = st.selectbox("Select Period", [f"P{i+1}" for i in range(cfg.periods_per_day)], key="absent_period")
+        period_idx = st.selectbox("Select Period", range(cfg.periods_per_day), format_func=_period_label, key="absent_period")
     
     if st.button("🔍 Find Substitute", type="primary"):
-        day_idx = cfg.days.index(absent_day)
-        period_idx = int(absent_period.replace("P", "")) - 1
-        
         # Get the class and subject at this slot
-        classes_at_slot = []
-        for (cid, d, p), (subj, tid) in st.session_state.class_timetable.items():
-            if d == day_idx and p == period_idx:
-                classes_at_slot.append((cid, subj, tid))
+        classes_at_slot = _slot_lessons().get((day_idx, period_idx), [])
+        busy_teachers = {tid for _, _, tid in classes_at_slot}
         
         if not classes_at_slot:
             st.success("All classes have free period!")
@@ -848,17 +1060,13 @@ def tab_substitution() -> None:
         st.subheader("📋 Substitution Plan")
         for cid, subj, original_teacher in classes_at_slot:
             # Find teachers who can teach this subject and are free
-            potential_subs = []
-            for t in st.session_state.teachers:
-                if subj in t.subjects and t.teacher_id != original_teacher:
-                    # Check if teacher is free at this time
-                    is_free = True
-                    for (c2, d2, p2), (s2, t2) in st.session_state.class_timetable.items():
-                        if d2 == day_idx and p2 == period_idx and t2 == t.teacher_id:
-                            is_free = False
-                            break
-                    if is_free:
-                        potential_subs.append(t.teacher_id)
+            potential_subs = [
+                t.teacher_id
+                for t in st.session_state.teachers
+                if subj in t.subjects
+                and t.teacher_id != original_teacher
+                and t.teacher_id not in busy_teachers
+            ]
             
             with st.expander(f"**{cid}**: {subj} ({original_teacher})", expanded=True):
                 if potential_subs:
@@ -866,6 +1074,8 @@ def tab_substitution() -> None:
                 else:
                     st.warning("⚠️ No substitute available for this subject!")
 
+
+@st.fragment
 def tab_free_teacher() -> None:
     """Free Teacher Finder - Instantly find free teachers."""
     st.header("👨‍🏫 Free Teacher Finder")
@@ -879,12 +1089,9 @@ def tab_free_teacher() -> None:
     
     col1, col2 = st.columns(2)
     with col1:
-        free_day = st.selectbox("Select Day", cfg.days, key="free_day")
+        day_idx = st.selectbox("Select Day", range(len(cfg.days)), format_func=cfg.days.__getitem__, key="free_day")
     with col2:
-        free_period = st.selectbox("Select Period", [f"P{i+1}" for i in range(cfg.periods_per_day)], key="free_period")
-    
-    day_idx = cfg.days.index(free_day)
-    period_idx = int(free_period.replace("P", "")) - 1
+        period_idx = st.selectbox("Select Period", range(cfg.periods_per_day), format_func=_period_label, key="free_period")
     
     # Skip if break
     if period_idx in cfg.break_periods:
@@ -892,23 +1099,23 @@ def tab_free_teacher() -> None:
         return
     
     # Find all teachers teaching at this time
-    busy_teachers = set()
-    for (cid, d, p), (subj, tid) in st.session_state.class_timetable.items():
-        if d == day_idx and p == period_idx:
-            busy_teachers.add(tid)
+    busy_teachers = {tid for _, _, tid in _slot_lessons().get((day_idx, period_idx), [])}
     
     # Find free teachers
     all_teachers = set(t.teacher_id for t in st.session_state.teachers)
     free_teachers = all_teachers - busy_teachers
     
-    st.subheader(f"📅 {free_day} - {free_period}")
+    st.subheader(f"📅 {cfg.days[day_idx]} - {_period_label(period_idx)}")
     
     if free_teachers:
         st.success(f"**{len(free_teachers)} teachers available:**")
-        for t in sorted(free_teachers):
-            teacher = next((x for x in st.session_state.teachers if x.teacher_id == t), None)
-            if teacher:
-                st.markdown(f"• **{t}** - Subjects: {', '.join(teacher.subjects)}")
+        by_id = {x.teacher_id: x for x in st.session_state.teachers}
+        st.markdown(
+            "  \n".join(
+                f"• **{t}** - Subjects: {', '.join(by_id[t].subjects)}"
+                for t in sorted(free_teachers)
+            )
+        )
     else:
         st.warning("⚠️ All teachers are busy during this period!")
 
@@ -924,71 +1131,156 @@ def tab_load_analyzer() -> None:
     cfg = st.session_state.config
     
     # Calculate load per teacher
-    teacher_load = {}
-    for t in st.session_state.teachers:
-        teacher_load[t.teacher_id] = {
-            'total': 0,
-            'daily': {d: 0 for d in cfg.days},
-            'subjects': {}
-        }
-    
-    for (cid, d, p), (subj, tid) in st.session_state.class_timetable.items():
-        if p not in cfg.break_periods and tid in teacher_load:
-            teacher_load[tid]['total'] += 1
-            teacher_load[tid]['daily'][cfg.days[d]] += 1
-            teacher_load[tid]['subjects'][subj] = teacher_load[tid]['subjects'].get(subj, 0) + 1
+    teacher_ids = list(dict.fromkeys(t.teacher_id for t in st.session_state.teachers))
+    load = _teacher_day_load(st.session_state.class_timetable, teacher_ids, cfg)
+    by_id = {t.teacher_id: t for t in st.session_state.teachers}
+    totals = load.sum(axis=1)
+    max_allowed = np.array([by_id[tid].max_periods_per_week for tid in teacher_ids], dtype=int)
     
     # Display load
     st.subheader("📈 Weekly Workload")
     
-    # Create load data
-    load_data = []
-    for tid, data in teacher_load.items():
-        teacher = next((t for t in st.session_state.teachers if t.teacher_id == tid), None)
-        max_allowed = teacher.max_periods_per_week if teacher else 30
-        load_pct = (data['total'] / max_allowed * 100) if max_allowed > 0 else 0
-        
-        status = "✅" if data['total'] <= max_allowed else "⚠️"
-        
-        load_data.append({
-            "Teacher": tid,
-            "Total Periods": data['total'],
+    if teacher_ids:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            load_pct = np.where(max_allowed > 0, totals / max_allowed * 100, 0)
+        load_data = pd.DataFrame({
+            "Teacher": teacher_ids,
+            "Total Periods": totals,
             "Max Allowed": max_allowed,
-            "Utilization %": f"{load_pct:.0f}%",
-            "Status": status
+            "Utilization %": load_pct,
+            "Status": np.where(totals <= max_allowed, "✅", "⚠️"),
         })
-    
-    if load_data:
-        st.dataframe(load_data, use_container_width=True)
+        # Keep utilisation numeric and let the grid draw/format it, instead
+        # of pre-formatting a string per teacher.
+        st.dataframe(
+            load_data,
+            column_config={
+                "Utilization %": st.column_config.ProgressColumn(
+                    "Utilization %", format="%.0f%%", min_value=0, max_value=100
+                ),
+            },
+            width="stretch",
+        )
     
     # Daily distribution
     st.subheader("📅 Daily Distribution")
-    daily_data = []
-    for tid, data in teacher_load.items():
-        row = {"Teacher": tid}
-        for d in cfg.days:
-            row[d] = data['daily'].get(d, 0)
-        row["Total"] = data['total']
-        daily_data.append(row)
-    
-    if daily_data:
-        st.dataframe(daily_data, use_container_width=True)
+    if teacher_ids:
+        daily_data = pd.DataFrame(load, columns=cfg.days)
+        daily_data.insert(0, "Teacher", teacher_ids)
+        daily_data["Total"] = totals
+        st.dataframe(daily_data, width="stretch")
     
     # Overload warnings
     st.subheader("⚠️ Overload Alerts")
-    overloads = []
-    for tid, data in teacher_load.items():
-        teacher = next((t for t in st.session_state.teachers if t.teacher_id == tid), None)
-        if teacher and data['total'] > teacher.max_periods_per_week:
-            overloads.append(f"**{tid}**: {data['total']}/{teacher.max_periods_per_week} periods (exceeded by {data['total'] - teacher.max_periods_per_week})")
+    over = np.flatnonzero(totals > max_allowed)
     
-    if overloads:
-        for alert in overloads:
-            st.warning(alert)
+    if over.size:
+        # One warning and one table rather than an alert element per teacher
+        st.warning(f"**{over.size}** teacher(s) over their weekly limit:")
+        st.dataframe(
+            pd.DataFrame({
+                "Teacher": [teacher_ids[i] for i in over],
+                "Periods": totals[over],
+                "Max Allowed": max_allowed[over],
+                "Exceeded By": totals[over] - max_allowed[over],
+            }),
+            width="stretch",
+            hide_index=True,
+        )
     else:
         st.success("✅ All teachers are within their workload limits!")
 
 
+def _teacher_day_load(tt: Timetable, teachers: List[str], cfg: SchoolConfig) -> np.ndarray:
+    """Teacher × day count of taught (non-break) periods.
+
+    Shared by the Load Analyzer and Heatmaps tabs, and kept in session state
+    until the timetable, teacher list or config changes.
+    """
+    sig = (tuple(teachers), tuple(cfg.days), tuple(sorted(cfg.break_periods)))
+    cached = st.session_state.get("teacher_day_load")
+    if cached is not None and cached[0] is tt and cached[1] == sig:
+        return cached[2]
+
+    n_days = len(cfg.days)
+    index = {tid: i for i, tid in enumerate(teachers)}
+    rows: List[int] = []
+    cols: List[int] = []
+    for key, (_, tid) in tt.items():
+        if not isinstance(key, (tuple, list)) or len(key) != 3:
+            continue
+        _, d, p = key
+        if p in cfg.break_periods or d >= n_days:
+            continue
+        i = index.get(tid)
+        if i is not None:
+            rows.append(i)
+            cols.append(d)
+    load = np.zeros((len(teachers), n_days), dtype=np.int16)
+    np.add.at(load, (rows, cols), 1)
+
+    st.session_state.teacher_day_load = (tt, sig, load)
+    return load
+
+
+def _heatmap_figure(load: np.ndarray, teachers: List[str], days: List[str]):
+    """Build the teacher × day dot heatmap for a _teacher_day_load matrix.
+
+    The figure is kept in session state and reused for as long as the same
+    load matrix comes back, so reruns triggered by other widgets don't
+    rebuild it.
+    """
+    cached = st.session_state.get("heatmap_fig")
+    if cached is not None and cached[0] is load:
+        return cached[1]
+
+    # Build a "wave-dot" style heatmap: grid of circles whose size and brightness
+    # represent load. This feels more cinematic than plain blocks.
+    # Row-major over (teacher, day), matching load.ravel().
+    xs = np.tile(days, len(teachers))
+    ys = np.repeat(teachers, len(days))
+    colors = load.ravel()
+    # Base dot size + extra per period
+    sizes = 10 + 10 * colors
+
+    # Plain graph_objects: plotly.express would build and group a DataFrame
+    # first, which costs more than the figure itself at this size.
+    fig = go.Figure(
+        go.Scatter(
+            x=xs,
+            y=ys,
+            mode="markers",
+            marker=dict(
+                color=colors,
+                size=sizes,
+                sizemode="area",
+                sizeref=2.0 * sizes.max(initial=10) / 20**2,
+                colorscale="Viridis",
+                colorbar=dict(title="Load"),
+                opacity=0.85,
+                line=dict(width=0),
+            ),
+            hovertemplate="Day=%{x}<br>Teacher=%{y}<br>Load=%{marker.color}<extra></extra>",
+        ),
+        # Layout goes through the constructor too, so the figure is
+        # validated once rather than again by a follow-up update_layout.
+        layout=go.Layout(
+            template="plotly_dark",
+            paper_bgcolor="#0d1117",
+            plot_bgcolor="#0d1117",
+            font=dict(color="#f0f6fc"),
+            margin=dict(l=40, r=20, t=40, b=40),
+            xaxis=dict(title="Day"),
+            yaxis=dict(title="Teacher", categoryorder="array", categoryarray=teachers),
+            # Let plotly.js tween dot size/colour in the browser when the data
+            # changes, instead of the chart just snapping to the new state.
+            transition=dict(duration=300, easing="cubic-in-out"),
+        ),
+    )
+    st.session_state.heatmap_fig = (load, fig)
+    return fig
+
+
 def tab_heatmaps() -> None:
     st.header("🔥 Heatmaps")
     if not st.session_state.class_timetable:
@@ -997,67 +1289,44 @@ def tab_heatmaps() -> None:
 
     cfg: SchoolConfig = st.session_state.config
     tt: Timetable = st.session_state.class_timetable
-    teachers = [t.teacher_id for t in st.session_state.teachers]
-    days = cfg.days
-
-    # Build teacher × day load matrix
-    load = np.zeros((len(teachers), len(days)), dtype=int)
-    for key, (_, tid) in tt.items():
-        if not isinstance(key, (tuple, list)) or len(key) != 3:
-            continue
-        _, d, p = key
-        if p in cfg.break_periods:
-            continue
-        if tid in teachers:
-            i = teachers.index(tid)
-            load[i, d] += 1
+    teachers = list(dict.fromkeys(t.teacher_id for t in st.session_state.teachers))
 
     if not teachers:
         st.info("Add some teachers first.")
         return
 
-    # Build a "wave-dot" style heatmap: grid of circles whose size and brightness
-    # represent load. This feels more cinematic than plain blocks.
-    xs: List[str] = []
-    ys: List[str] = []
-    sizes: List[float] = []
-    colors: List[int] = []
-    for i, tid in enumerate(teachers):
-        for j, day in enumerate(days):
-            xs.append(day)
-            ys.append(tid)
-            val = int(load[i, j])
-            colors.append(val)
-            # Base dot size + extra per period
-            sizes.append(10 + 10 * val)
-
-    fig = px.scatter(
-        x=xs,
-        y=ys,
-        color=colors,
-        size=sizes,
-        color_continuous_scale="Viridis",
-        labels=dict(x="Day", y="Teacher", color="Load"),
-    )
-    fig.update_traces(
-        mode="markers",
-        marker=dict(
-            opacity=0.85,
-            line=dict(width=0),
-        ),
-    )
-    fig.update_layout(
-        template="plotly_dark",
-        paper_bgcolor="#0d1117",
-        plot_bgcolor="#0d1117",
-        font=dict(color="#f0f6fc"),
-        margin=dict(l=40, r=20, t=40, b=40),
-        yaxis=dict(categoryorder="array", categoryarray=teachers),
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    load = _teacher_day_load(tt, teachers, cfg)
+    fig = _heatmap_figure(load, teachers, cfg.days)
+    st.plotly_chart(fig, width="stretch", key="teacher_load_heatmap")
     st.caption("Bigger, brighter dots = more periods for that teacher on that day.")
 
 
+def _class_pdf(flat: Timetable, cfg: SchoolConfig, only: str | None = None) -> bytes:
+    """Class timetables PDF (all classes, or just `only`).
+
+    Called from download_button data= callables, so pdf_export and
+    reportlab are imported when a PDF is actually requested.
+    """
+    from pdf_export import export_class_timetables_pdf, flat_to_class_timetables
+
+    class_tt = flat_to_class_timetables(flat)
+    if only is not None:
+        class_tt = {only: class_tt[only]}
+    return export_class_timetables_pdf(class_tt, cfg)
+
+
+def _teacher_pdf(
+    teacher_tt: Dict[str, Dict[Tuple[int, int], Tuple[str, str]]], cfg: SchoolConfig
+) -> bytes:
+    """Teacher timetables PDF; imports pdf_export on first download like _class_pdf."""
+    from pdf_export import export_teacher_timetables_pdf
+
+    return export_teacher_timetables_pdf(teacher_tt, cfg)
+
+
+# Picking a single class/teacher only changes which download button shows,
+# so the tab reruns on its own like the Substitution/Free Teacher tabs.
+@st.fragment
 def tab_pdf_export() -> None:
     st.header("📄 Export PDFs")
     if not (st.session_state.class_timetable and st.session_state.teacher_timetable):
@@ -1065,17 +1334,17 @@ def tab_pdf_export() -> None:
         return
 
     cfg: SchoolConfig = st.session_state.config
-    class_tt = flat_to_class_timetables(st.session_state.class_timetable)
-    class_pdf = export_class_timetables_pdf(class_tt, cfg)
-    teacher_pdf = export_teacher_timetables_pdf(
-        st.session_state.teacher_timetable, cfg
-    )
+    class_tt = st.session_state.class_timetable
+    teacher_tt = st.session_state.teacher_timetable
+    # PDFs are built only when a download button is clicked: each data=
+    # callable runs on its own thread at click time, so it closes over the
+    # timetables here rather than reading st.session_state.
     st.subheader("All timetables")
     col1, col2 = st.columns(2)
     with col1:
         if st.download_button(
             "📥 Download ALL Class Timetables (PDF)",
-            data=class_pdf,
+            data=lambda: _class_pdf(class_tt, cfg),
             file_name="class_timetables.pdf",
             mime="application/pdf",
             key="dl_all_classes_pdf",
@@ -1086,7 +1355,7 @@ def tab_pdf_export() -> None:
     with col2:
         if st.download_button(
             "📥 Download ALL Teacher Timetables (PDF)",
-            data=teacher_pdf,
+            data=lambda: _teacher_pdf(teacher_tt, cfg),
             file_name="teacher_timetables.pdf",
             mime="application/pdf",
             key="dl_all_teachers_pdf",
@@ -1098,37 +1367,33 @@ def tab_pdf_export() -> None:
     st.markdown("---")
     st.subheader("Single class / teacher")
 
-    class_ids = sorted(class_tt.keys())
-    teacher_ids = sorted(st.session_state.teacher_timetable.keys())
+    # Selectbox options only change with the timetable, so sort once per timetable
+    class_options = _per_timetable(
+        "pdf_class_options",
+        lambda: ["— select class —"] + sorted({cid for cid, _, _ in class_tt}),
+    )
+    teacher_options = _per_timetable(
+        "pdf_teacher_options", lambda: ["— select teacher —"] + sorted(teacher_tt)
+    )
 
     colc, colt = st.columns(2)
     with colc:
-        sel_class = st.selectbox(
-            "Class", ["— select class —"] + class_ids, key="pdf_single_class"
-        )
+        sel_class = st.selectbox("Class", class_options, key="pdf_single_class")
         if sel_class != "— select class —":
-            single_class_pdf = export_class_timetables_pdf(
-                {sel_class: class_tt[sel_class]}, cfg
-            )
             st.download_button(
                 f"📥 Download {sel_class} Timetable (PDF)",
-                data=single_class_pdf,
+                data=lambda: _class_pdf(class_tt, cfg, only=sel_class),
                 file_name=f"{sel_class}_timetable.pdf",
                 mime="application/pdf",
                 key="dl_one_class_pdf",
             )
 
     with colt:
-        sel_teacher = st.selectbox(
-            "Teacher", ["— select teacher —"] + teacher_ids, key="pdf_single_teacher"
-        )
+        sel_teacher = st.selectbox("Teacher", teacher_options, key="pdf_single_teacher")
         if sel_teacher != "— select teacher —":
-            single_teacher_pdf = export_teacher_timetables_pdf(
-                {sel_teacher: st.session_state.teacher_timetable[sel_teacher]}, cfg
-            )
             st.download_button(
                 f"📥 Download {sel_teacher} Timetable (PDF)",
-                data=single_teacher_pdf,
+                data=lambda: _teacher_pdf({sel_teacher: teacher_tt[sel_teacher]}, cfg),
                 file_name=f"{sel_teacher}_timetable.pdf",
                 mime="application/pdf",
                 key="dl_one_teacher_pdf",
@@ -1143,13 +1408,8 @@ def tab_pdf_export() -> None:
 def main() -> None:
     _init_session()
 
-    # Custom header with datetime
-    from datetime import datetime
-    import pytz
-    
-    # Set timezone to IST (India Standard Time)
-    ist = pytz.timezone('Asia/Kolkata')
-    now = datetime.now(ist)
+    # Custom header with datetime (IST)
+    now = datetime.now(IST)
     date_str = now.strftime("%a, %d %b %Y")
     time_str = now.strftime("%I:%M %p")
     
@@ -5,7 +5,7 @@ models.py — Data models for Timable
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Teacher:
     teacher_id: str
     name: str
@@ -15,19 +15,19 @@ class Teacher:
     max_periods_per_week: int = 30
     target_free_periods_per_day: int = 0
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ClassSubject:
     subject: str
     weekly_periods: int
     teacher_id: str
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Class:
     id: str
     name: str
     subjects: List[ClassSubject]
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class SchoolConfig:
     days: List[str] = field(default_factory=lambda: ["Mon", "Tue", "Wed", "Thu", "Fri"])
     periods_per_day: int = 8
@@ -27,7 +27,7 @@ def export_timetable_pdf(timetable, config, filename="timetable.pdf"):
     doc.build([table])
 
 from io import BytesIO
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -59,42 +59,44 @@ def _light_theme_table_style(num_rows: int, num_cols: int) -> TableStyle:
     ])
 
 
-def export_class_timetables_pdf(
-    class_timetables: Dict[str, Dict[Tuple[int, int], Tuple[str, str]]],
+def _timetables_pdf(
+    timetables: Dict[str, Dict[Tuple[int, int], Tuple[str, str]]],
     config: SchoolConfig,
+    title: str,
+    cell_text: Callable[[Tuple[str, str]], str],
 ) -> bytes:
     """
-    Creates a PDF with one table per class.
-    class_timetables: class_id -> (day_idx, period_idx) -> (subject, teacher_id)
+    Shared body of the class/teacher exports: one titled table per key,
+    rows = days, cols = [Day, Period 1, Period 2, ...].
     """
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=1.5*cm, rightMargin=1.5*cm)
     styles = getSampleStyleSheet()
     story = []
 
-    for class_id in sorted(class_timetables.keys()):
-        tt = class_timetables[class_id]
-        # Rows = days, Cols = [Day, Period 1, Period 2, ...]
-        period_cols = [
-            f"P{p+1}" + (f" ({get_break_name(config, p)})" if p in config.break_periods else "")
-            for p in range(config.periods_per_day)
-        ]
-        header = ["Day"] + period_cols
+    # Break labels are the same for every table; resolve them once
+    breaks = {p: get_break_name(config, p) for p in config.break_periods}
+    period_cols = [
+        f"P{p+1}" + (f" ({breaks[p]})" if p in breaks else "")
+        for p in range(config.periods_per_day)
+    ]
+    header = ["Day"] + period_cols
+
+    for key in sorted(timetables.keys()):
+        tt = timetables[key]
         rows = [header]
         for d in range(len(config.days)):
             row = [config.days[d]]
             for p in range(config.periods_per_day):
-                if p in config.break_periods:
-                    row.append(get_break_name(config, p))
+                if p in breaks:
+                    row.append(breaks[p])
                 else:
-                    cell = tt.get((d, p), ("", ""))
-                    subj, _ = cell
-                    row.append(subj if subj else "Free period")
+                    row.append(cell_text(tt.get((d, p), ("", ""))))
             rows.append(row)
 
         t = Table(rows, colWidths=[2*cm] + [2.2*cm] * config.periods_per_day)
         t.setStyle(_light_theme_table_style(len(rows), len(header)))
-        story.append(Paragraph(f"<b>Class: {class_id}</b>", styles["Heading2"]))
+        story.append(Paragraph(f"<b>{title}: {key}</b>", styles["Heading2"]))
         story.append(Spacer(1, 0.3*cm))
         story.append(t)
         story.append(Spacer(1, 0.8*cm))
@@ -103,6 +105,20 @@ def export_class_timetables_pdf(
     return buffer.getvalue()
 
 
+def export_class_timetables_pdf(
+    class_timetables: Dict[str, Dict[Tuple[int, int], Tuple[str, str]]],
+    config: SchoolConfig,
+) -> bytes:
+    """
+    Creates a PDF with one table per class.
+    class_timetables: class_id -> (day_idx, period_idx) -> (subject, teacher_id)
+    """
+    return _timetables_pdf(
+        class_timetables, config, "Class",
+        lambda cell: cell[0] if cell[0] else "Free period",
+    )
+
+
 def export_teacher_timetables_pdf(
     teacher_timetables: Dict[str, Dict[Tuple[int, int], Tuple[str, str]]],
     config: SchoolConfig,
@@ -111,40 +127,10 @@ def export_teacher_timetables_pdf(
     Creates a PDF with one table per teacher.
     teacher_timetables: teacher_id -> (day_idx, period_idx) -> (class_id, subject)
     """
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=1.5*cm, rightMargin=1.5*cm)
-    styles = getSampleStyleSheet()
-    story = []
-
-    for teacher_id in sorted(teacher_timetables.keys()):
-        tt = teacher_timetables[teacher_id]
-        period_cols = [
-            f"P{p+1}" + (f" ({get_break_name(config, p)})" if p in config.break_periods else "")
-            for p in range(config.periods_per_day)
-        ]
-        header = ["Day"] + period_cols
-        rows = [header]
-        for d in range(len(config.days)):
-            row = [config.days[d]]
-            for p in range(config.periods_per_day):
-                if p in config.break_periods:
-                    row.append(get_break_name(config, p))
-                else:
-                    cell = tt.get((d, p), ("", ""))
-                    cid, subj = cell
-                    val = f"{cid}: {subj}" if cid else "Free period"
-                    row.append(val)
-            rows.append(row)
-
-        t = Table(rows, colWidths=[2*cm] + [2.2*cm] * config.periods_per_day)
-        t.setStyle(_light_theme_table_style(len(rows), len(header)))
-        story.append(Paragraph(f"<b>Teacher: {teacher_id}</b>", styles["Heading2"]))
-        story.append(Spacer(1, 0.3*cm))
-        story.append(t)
-        story.append(Spacer(1, 0.8*cm))
-
-    doc.build(story)
-    return buffer.getvalue()
+    return _timetables_pdf(
+        teacher_timetables, config, "Teacher",
+        lambda cell: f"{cell[0]}: {cell[1]}" if cell[0] else "Free period",
+    )
 
 
 def class_timetable_to_grid(
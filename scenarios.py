@@ -9,7 +9,7 @@ def apply_scenario_overlay(base_tt, scenario_state, config, teachers):
     Apply scenario overlays to base timetable. Never mutates base.
     Returns resolved view.
     """
-    resolved = copy.deepcopy(base_tt)
+    resolved = dict(base_tt)
     day_idx = scenario_state.get("selected_day", 0)
     scenarios = scenario_state.get("scenarios", {})
 
@@ -24,35 +24,40 @@ def apply_scenario_overlay(base_tt, scenario_state, config, teachers):
             subject_teachers[s].append(t.teacher_id)
 
     # 1. Teacher absent today
-    if scenarios.get("teacher_absent", {}).get("active"):
-        tid = scenarios["teacher_absent"].get("teacher_id", "")
+    absent = scenarios.get("teacher_absent")
+    if absent and absent.get("active"):
+        tid = absent.get("teacher_id", "")
         if tid:
             _apply_teacher_absent(resolved, config, day_idx, tid, teacher_subjects, subject_teachers)
 
     # 2. Lab unavailable — replace lab periods with free (simplified)
-    if scenarios.get("lab_unavailable", {}).get("active"):
-        lab_subs = scenarios["lab_unavailable"].get("lab_subjects", "Physics,Chemistry,Biology").split(",")
+    lab = scenarios.get("lab_unavailable")
+    if lab and lab.get("active"):
+        lab_subs = lab.get("lab_subjects", "Physics,Chemistry,Biology").split(",")
         lab_set = {s.strip() for s in lab_subs if s.strip()}
         for (cid, d, p), (subj, _) in list(resolved.items()):
             if d == day_idx and subj in lab_set:
                 resolved[(cid, d, p)] = ("Free period", "")
 
     # 3. Shortened day
-    if scenarios.get("shortened_day", {}).get("active"):
-        new_max = scenarios["shortened_day"].get("max_periods", 4)
+    shortened = scenarios.get("shortened_day")
+    if shortened and shortened.get("active"):
+        new_max = shortened.get("max_periods", 4)
         _apply_shortened_day(resolved, config, day_idx, new_max)
 
     # 4. Emergency free period — insert free for a class in a slot
-    if scenarios.get("emergency_free", {}).get("active"):
-        cid = scenarios["emergency_free"].get("class_id", "")
-        period = scenarios["emergency_free"].get("period", 0)
+    emergency = scenarios.get("emergency_free")
+    if emergency and emergency.get("active"):
+        cid = emergency.get("class_id", "")
+        period = emergency.get("period", 0)
         if cid and (cid, day_idx, period) in resolved:
             resolved[(cid, day_idx, period)] = ("Free period", "")
 
     # 5. Substitute teacher assigned
-    if scenarios.get("substitute", {}).get("active"):
-        orig_tid = scenarios["substitute"].get("original_teacher", "")
-        sub_tid = scenarios["substitute"].get("substitute_teacher", "")
+    substitute = scenarios.get("substitute")
+    if substitute and substitute.get("active"):
+        orig_tid = substitute.get("original_teacher", "")
+        sub_tid = substitute.get("substitute_teacher", "")
         if orig_tid and sub_tid:
             for (cid, d, p), (subj, t) in list(resolved.items()):
                 if d == day_idx and t == orig_tid:
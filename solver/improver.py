@@ -1,8 +1,7 @@
 """Post-solve improvement via random swaps."""
 
-import copy
 import random
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 
 from models import Class, ClassPriorityConfig, SchoolConfig
 from solver.scoring import compute_timetable_score
@@ -34,36 +33,70 @@ def is_valid_swap(
     return True
 
 
+def _teacher_slots(
+    tt: Dict[Tuple[str, int, int], Tuple[str, str]],
+) -> Set[Tuple[str, int, int]]:
+    """(teacher_id, day, period) for every occupied cell."""
+    return {(tid, d, p) for (_, d, p), (_, tid) in tt.items()}
+
+
+def _class_slots(
+    tt: Dict[Tuple[str, int, int], Tuple[str, str]],
+) -> Dict[str, List[Tuple[str, int, int]]]:
+    """class_id -> its cell keys. Swaps never change the key set."""
+    cid_to_slots: Dict[str, List[Tuple[str, int, int]]] = {}
+    for k in tt:
+        cid_to_slots.setdefault(k[0], []).append(k)
+    return cid_to_slots
+
+
+def _swap_clashes(
+    tt: Dict[Tuple[str, int, int], Tuple[str, str]],
+    busy: Set[Tuple[str, int, int]],
+    a: Tuple[str, int, int],
+    b: Tuple[str, int, int],
+) -> bool:
+    """
+    Would swapping cells a and b of the same class double-book a teacher?
+    Only the two changed slots can gain a clash, and a same-class swap keeps
+    every (class, subject) count, so two lookups in busy (the teacher slots
+    of a clash-free tt) are enough.
+    """
+    tid_a, tid_b = tt[a][1], tt[b][1]
+    if tid_a == tid_b:
+        return False
+    return (tid_a, *b[1:]) in busy or (tid_b, *a[1:]) in busy
+
+
 def try_swap(
     class_timetable: Dict[Tuple[str, int, int], Tuple[str, str]],
-    config: SchoolConfig,
-    class_subject_info: Dict[Tuple[str, str], Tuple[int, str]],
+    busy: Optional[Set[Tuple[str, int, int]]] = None,
+    cid_to_slots: Optional[Dict[str, List[Tuple[str, int, int]]]] = None,
+    rng: Optional[random.Random] = None,
 ) -> Optional[Dict[Tuple[str, int, int], Tuple[str, str]]]:
     """
     Try swapping two slots for the same class. If valid, return new timetable.
+    busy / cid_to_slots may be passed in when calling repeatedly on one
+    timetable; otherwise they are built here. Slots are drawn from rng, or
+    from the module-level random if none is given.
     """
-    slots = list(class_timetable.keys())
-    if len(slots) < 2:
+    if len(class_timetable) < 2:
         return None
-
-    cid_to_slots: Dict[str, List] = {}
-    for k in slots:
-        cid = k[0]
-        if cid not in cid_to_slots:
-            cid_to_slots[cid] = []
-        cid_to_slots[cid].append(k)
+    if busy is None:
+        busy = _teacher_slots(class_timetable)
+    if cid_to_slots is None:
+        cid_to_slots = _class_slots(class_timetable)
+    sample = (rng or random).sample
 
     for cid, cslots in cid_to_slots.items():
         if len(cslots) < 2:
             continue
-        a, b = random.sample(cslots, 2)
-        new_tt = copy.deepcopy(class_timetable)
-        subj_a, tid_a = new_tt[a]
-        subj_b, tid_b = new_tt[b]
-        new_tt[a] = (subj_b, tid_b)
-        new_tt[b] = (subj_a, tid_a)
-        if is_valid_swap(new_tt, config, class_subject_info):
-            return new_tt
+        a, b = sample(cslots, 2)
+        if _swap_clashes(class_timetable, busy, a, b):
+            continue
+        new_tt = dict(class_timetable)
+        new_tt[a], new_tt[b] = class_timetable[b], class_timetable[a]
+        return new_tt
     return None
 
 
@@ -73,8 +106,14 @@ def improve_timetable(
     classes: List[Class],
     priority_configs: List[ClassPriorityConfig],
     max_iters: int = 100,
+    seed: Optional[int] = None,
 ) -> Dict[Tuple[str, int, int], Tuple[str, str]]:
-    """Try swaps to improve score. Keep best."""
+    """
+    Try swaps to improve score. Keep best.
+    Swaps are drawn from a private random.Random(seed), so concurrent
+    sessions don't share (or reseed) the global generator and a given seed
+    reproduces the same result.
+    """
     class_subject_info = {}
     for c in classes:
         cid = getattr(c, 'class_id', getattr(c, 'id', ''))
@@ -85,15 +124,23 @@ def improve_timetable(
             )
 
     best = dict(class_timetable)
+    # try_swap only checks the cells it changes, which is sound as long as
+    # the starting timetable is itself valid.
+    if not is_valid_swap(best, config, class_subject_info):
+        return best
     best_score = compute_timetable_score(best, config, priority_configs)
+    busy = _teacher_slots(best)
+    cid_to_slots = _class_slots(best)
+    rng = random.Random(seed)
 
     for _ in range(max_iters):
-        swapped = try_swap(best, config, class_subject_info)
+        swapped = try_swap(best, busy, cid_to_slots, rng)
         if swapped is None:
             continue
         new_score = compute_timetable_score(swapped, config, priority_configs)
         if new_score > best_score:
             best = swapped
             best_score = new_score
+            busy = _teacher_slots(best)
 
     return best
@@ -7,8 +7,9 @@ All data saved to disk. Refresh → everything still there.
 storage.py — Data persistence for Timable
 """
 import json
+from dataclasses import replace
 from pathlib import Path
-from typing import List, Any, Optional, Dict, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 from datetime import datetime
 
 from models import Teacher, Class, ClassSubject, ClassPriorityConfig, SchoolConfig
@@ -26,6 +27,7 @@ BASE_TIMETABLE_FILE = DATA_DIR / "base_timetable.json"
 SCENARIO_STATE_FILE = DATA_DIR / "scenario_state.json"
 
 Timetable = Dict[Tuple[str, int, int], Tuple[str, str]]
+T = TypeVar("T")
 
 
 def _ensure_data_dir() -> None:
@@ -33,6 +35,47 @@ def _ensure_data_dir() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _file_sig(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        info = path.stat()
+    except FileNotFoundError:
+        return None
+    return info.st_mtime_ns, info.st_size
+
+
+# Every new Streamlit session loads teachers, classes, config and the base
+# timetable. Keep each parsed result keyed on the file's (mtime, size) so
+# sessions share one parse until the file changes. Cached values are shared:
+# loaders hand out copies of the top-level containers and of the config's
+# days/break_periods. Teachers and classes are frozen, but their list fields
+# are still shared, so edit them with dataclasses.replace, never in place.
+_parsed_cache: Dict[Path, Tuple[Tuple[int, int], Any]] = {}
+
+
+def _cached_parse(path: Path, parse: Callable[[], T]) -> T:
+    sig = _file_sig(path)
+    hit = _parsed_cache.get(path)
+    if sig is not None and hit is not None and hit[0] == sig:
+        return hit[1]
+    value = parse()
+    if sig is not None:
+        _parsed_cache[path] = (sig, value)
+    return value
+
+
+def _matches_disk(path: Path, value: Any) -> bool:
+    """True if path is known to already hold exactly value (so a save can be skipped)."""
+    hit = _parsed_cache.get(path)
+    return hit is not None and hit[0] == _file_sig(path) and hit[1] == value
+
+
+def _prime_parsed(path: Path, value: Any) -> None:
+    """Record what was just written, so the next load skips re-parsing it."""
+    sig = _file_sig(path)
+    if sig is not None:
+        _parsed_cache[path] = (sig, value)
+
+
 def _teacher_to_dict(t: Teacher) -> dict:
     """Convert Teacher to JSON-serializable dict."""
     return {
@@ -88,11 +131,7 @@ def _dict_to_class(d: dict) -> Class:
     )
 
 
-def load_teachers() -> List[Teacher]:
-    """Load all teachers from disk. Returns empty list if file doesn't exist."""
-    _ensure_data_dir()
-    if not TEACHERS_FILE.exists():
-        return []
+def _read_teachers() -> List[Teacher]:
     try:
         with open(TEACHERS_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -101,19 +140,26 @@ def load_teachers() -> List[Teacher]:
         return []
 
 
+def load_teachers() -> List[Teacher]:
+    """Load all teachers from disk. Returns empty list if file doesn't exist."""
+    _ensure_data_dir()
+    if not TEACHERS_FILE.exists():
+        return []
+    return list(_cached_parse(TEACHERS_FILE, _read_teachers))
+
+
 def save_teachers(teachers: List[Teacher]) -> None:
     """Save all teachers to disk. Overwrites existing file."""
     _ensure_data_dir()
+    if _matches_disk(TEACHERS_FILE, teachers):
+        return
     data = [_teacher_to_dict(t) for t in teachers]
     with open(TEACHERS_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    _prime_parsed(TEACHERS_FILE, list(teachers))
 
 
-def load_classes() -> List[Class]:
-    """Load all classes from disk. Returns empty list if file doesn't exist."""
-    _ensure_data_dir()
-    if not CLASSES_FILE.exists():
-        return []
+def _read_classes() -> List[Class]:
     try:
         with open(CLASSES_FILE, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -122,12 +168,23 @@ def load_classes() -> List[Class]:
         return []
 
 
+def load_classes() -> List[Class]:
+    """Load all classes from disk. Returns empty list if file doesn't exist."""
+    _ensure_data_dir()
+    if not CLASSES_FILE.exists():
+        return []
+    return list(_cached_parse(CLASSES_FILE, _read_classes))
+
+
 def save_classes(classes: List[Class]) -> None:
     """Save all classes to disk. Overwrites existing file."""
     _ensure_data_dir()
+    if _matches_disk(CLASSES_FILE, classes):
+        return
     data = [_class_to_dict(c) for c in classes]
     with open(CLASSES_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    _prime_parsed(CLASSES_FILE, list(classes))
 
 
 def load_priority_configs() -> List[ClassPriorityConfig]:
@@ -176,6 +233,11 @@ def load_config() -> SchoolConfig:
             periods_per_day=8,
             break_periods={3: "Lunch"},
         )
+    cfg = _cached_parse(CONFIG_FILE, _read_config)
+    return replace(cfg, days=list(cfg.days), break_periods=dict(cfg.break_periods))
+
+
+def _read_config() -> SchoolConfig:
     try:
         with open(CONFIG_FILE, "r", encoding="utf-8") as f:
             d = json.load(f)
@@ -198,6 +260,8 @@ def load_config() -> SchoolConfig:
 def save_config(config: SchoolConfig) -> None:
     """Save school config to disk."""
     _ensure_data_dir()
+    if _matches_disk(CONFIG_FILE, config):
+        return
     data = {
         "days": config.days,
         "periods_per_day": config.periods_per_day,
@@ -205,18 +269,34 @@ def save_config(config: SchoolConfig) -> None:
     }
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
+    _prime_parsed(CONFIG_FILE, config)
+
+
+# The History tab calls load_history() on every rerun; keep the parsed list
+# keyed on the file's (mtime, size) so it is only re-read after a change.
+_history_cache: Optional[Tuple[Tuple[int, int], List[dict]]] = None
+
+
+def _history_sig() -> Optional[Tuple[int, int]]:
+    return _file_sig(HISTORY_FILE)
 
 
 def load_history() -> List[dict]:
-    """Load activity history. Newest first."""
+    """Load activity history. Newest first. The list is cached: don't mutate it."""
+    global _history_cache
     _ensure_data_dir()
-    if not HISTORY_FILE.exists():
+    sig = _history_sig()
+    if sig is None:
         return []
+    if _history_cache is not None and _history_cache[0] == sig:
+        return _history_cache[1]
     try:
         with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+            history = json.load(f)
     except (json.JSONDecodeError, KeyError):
         return []
+    _history_cache = (sig, history)
+    return history
 
 
 def is_demo_loaded() -> bool:
@@ -249,6 +329,11 @@ def load_base_timetable() -> Optional[dict]:
     _ensure_data_dir()
     if not BASE_TIMETABLE_FILE.exists():
         return None
+    tt = _cached_parse(BASE_TIMETABLE_FILE, _read_base_timetable)
+    return None if tt is None else dict(tt)
+
+
+def _read_base_timetable() -> Optional[Timetable]:
     try:
         with open(BASE_TIMETABLE_FILE, "r", encoding="utf-8") as f:
             raw = json.load(f)
@@ -271,11 +356,16 @@ def load_base_timetable() -> Optional[dict]:
 def save_base_timetable(timetable: Timetable) -> None:
     """Save base timetable (convert tuple keys to JSON-serializable dict)."""
     _ensure_data_dir()
+    if _matches_disk(BASE_TIMETABLE_FILE, timetable):
+        return
     raw: Dict[str, Any] = {}
     for (cid, d, p), (subj, tid) in timetable.items():
         raw[f"{cid}|{d}|{p}"] = [subj, tid]
+    # Compact separators: this is the largest data file and nobody edits it
+    # by hand, so skip the indentation that roughly doubles its size.
     with open(BASE_TIMETABLE_FILE, "w", encoding="utf-8") as f:
-        json.dump(raw, f, indent=2)
+        json.dump(raw, f, separators=(",", ":"))
+    _prime_parsed(BASE_TIMETABLE_FILE, dict(timetable))
 
 
 def load_scenario_state() -> dict:
@@ -311,6 +401,7 @@ def clear_scenario_state() -> None:
 
 def append_history(action: str, target: str, summary: str, details: str = "") -> None:
     """Append one history entry. Keeps last 500 entries."""
+    global _history_cache
     _ensure_data_dir()
     history = load_history()
     entry = {
@@ -320,7 +411,7 @@ def append_history(action: str, target: str, summary: str, details: str = "") ->
         "summary": summary,
         "details": details,
     }
-    history.insert(0, entry)
-    history = history[:500]
+    history = [entry] + history[:499]
     with open(HISTORY_FILE, "w", encoding="utf-8") as f:
         json.dump(history, f, indent=2, ensure_ascii=False)
+    _history_cache = (_history_sig(), history)